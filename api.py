@@ -2,12 +2,16 @@ from fastapi import UploadFile, File
 from fastapi.responses import JSONResponse
 from fastapi import FastAPI
 import os
-import shutil
-from src.data_loader import load_all_documents
-from src.vectorstore import FaissVectorStore
 from pydantic import BaseModel
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 from src.search import RAGSearch
+from src.parse_cache import ParsedDocumentCache, rebuild_index_from_cache
+from src.config import (
+    EMBEDDING_BACKEND, EMBEDDING_MODEL, CPU_THREADS, BACKEND_OPTIONS, CHUNK_STRATEGY, CHUNK_SIZE, CHUNK_OVERLAP,
+    RECORD_TEXT_FIELDS, RECORD_METADATA_FIELDS, RAG_RERANK, RAG_ROUTING, RAG_ROUTE_CLASSIFIER, SMALL_LLM_MODEL,
+    make_vectorstore,
+)
 
 app = FastAPI()
 
@@ -21,37 +25,72 @@ app.add_middleware(
 
 class ChatRequest(BaseModel):
     message: str
+    # Optional metadata filter, e.g. {"source": "books.jsonl", "publication_year": [2005, 2008]}
+    filter: Optional[dict] = None
+    # Conversation id chosen by the client; follow-up questions only reuse context from the same session
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
 
 
 # Initialize RAGSearch (handles loading vectorstore internally)
-rag_search = RAGSearch()
+rag_search = RAGSearch(
+    embedding_model=EMBEDDING_MODEL,
+    embedding_backend=EMBEDDING_BACKEND,
+    backend_options=BACKEND_OPTIONS,
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    chunk_strategy=CHUNK_STRATEGY,
+    rerank=RAG_RERANK,
+    rerank_threads=CPU_THREADS,
+    routing=RAG_ROUTING,
+    small_llm_model=SMALL_LLM_MODEL,
+    route_classifier=RAG_ROUTE_CLASSIFIER,
+    record_text_fields=RECORD_TEXT_FIELDS,
+    record_metadata_fields=RECORD_METADATA_FIELDS,
+)
 UPLOAD_DIR = "data/uploaded"
 EMBEDDED_DIR = "data/embedded"
+parse_cache = ParsedDocumentCache("parse_cache")
+# Plain def (like /chat): ingest and rebuild are long blocking jobs and must not stall the event loop
 @app.post("/embed_all")
-async def embed_all_endpoint():
-    docs = load_all_documents(UPLOAD_DIR)
-    if not docs:
+def embed_all_endpoint():
+    store = make_vectorstore("faiss_store")
+    # Append to the existing index if there is one
+    if os.path.exists(os.path.join("faiss_store", "faiss.index")):
+        store.load()
+    n_docs, n_record_files = store.ingest_directory(UPLOAD_DIR, EMBEDDED_DIR, RECORD_TEXT_FIELDS, RECORD_METADATA_FIELDS, cache=parse_cache)
+    if not n_docs and not n_record_files:
         return {"status": "no_files", "detail": "No documents to embed."}
-    store = FaissVectorStore("faiss_store")
-    store.load(documents=docs)
-    store.build_from_documents(docs)
-    # Move files from uploaded to embedded
-    for filename in os.listdir(UPLOAD_DIR):
-        src = os.path.join(UPLOAD_DIR, filename)
-        dst = os.path.join(EMBEDDED_DIR, filename)
-        if os.path.isfile(src):
-            shutil.move(src, dst)
-    return {"status": "success", "detail": f"Embedded and moved {len(docs)} documents."}
+    return {"status": "success", "detail": f"Embedded and moved {n_docs} documents and {n_record_files} record files."}
+
+@app.post("/rebuild_from_cache")
+def rebuild_from_cache_endpoint():
+    # Re-chunk and re-embed everything in data/embedded with the current settings; cached files are not re-parsed
+    store = make_vectorstore("faiss_store")
+    try:
+        n_vectors = rebuild_index_from_cache(store, parse_cache, EMBEDDED_DIR, RECORD_TEXT_FIELDS, RECORD_METADATA_FIELDS)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "detail": f"Rebuild failed, previous index kept: {e}"})
+    if n_vectors == 0:
+        return {"status": "no_files", "detail": f"Nothing to rebuild in {EMBEDDED_DIR}; previous index kept."}
+    return {"status": "success", "detail": f"Rebuilt index with {n_vectors} vectors."}
 
+# Plain def: FastAPI runs it in its threadpool, so concurrent chats can share a query-embedding batch
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+def chat_endpoint(request: ChatRequest):
     user_message = request.message
-    summary = rag_search.search_and_summarize(user_message, top_k=3)
+    summary = rag_search.search_and_summarize(user_message, top_k=3, metadata_filter=request.filter, session_id=request.session_id)
     return ChatResponse(response=summary)
 
+@app.get("/stats")
+async def stats():
+    return {
+        "routing": rag_search.router.stats() if rag_search.router else "disabled",
+        "rerank": rag_search.reranker.stats() if rag_search.reranker else "disabled",
+    }
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
@@ -61,7 +100,7 @@ async def home_status():
     # Check embedding model
     try:
         embedding_model = rag_search.vectorstore.embedding_model
-        embedding_status = f"Embedding model: {embedding_model}"
+        embedding_status = f"Embedding model: {embedding_model} ({rag_search.vectorstore.embedding_backend})"
     except Exception as e:
         embedding_status = f"Embedding model error: {e}"
 
@@ -80,9 +119,16 @@ async def home_status():
     except Exception as e:
         llm_status = f"LLM error: {e}"
 
+    # Check reranker
+    if rag_search.reranker:
+        rerank_status = f"Reranker: {rag_search.reranker.model_name}, last call: {rag_search.reranker.stats()['last_call'] or 'n/a'}"
+    else:
+        rerank_status = "Reranker: disabled"
+
     return {
         "status": "ok",
         "embedding": embedding_status,
+        "rerank": rerank_status,
         "vectorstore": vectorstore_status,
         "llm": llm_status,
         "message": "Backend is ready for query."
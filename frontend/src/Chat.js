@@ -8,6 +8,8 @@ export default function Chat() {
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
   const chatEndRef = useRef(null);
+  // One id per chat tab so the backend can tell follow-up questions apart between users
+  const sessionId = useRef(crypto.randomUUID());
 
   useEffect(() => {
     chatEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -19,7 +21,7 @@ export default function Chat() {
     setMessages((msgs) => [...msgs, userMsg]);
     setLoading(true);
     try {
-      const res = await axios.post("http://127.0.0.1:8000/chat", { message: input });
+      const res = await axios.post("http://127.0.0.1:8000/chat", { message: input, session_id: sessionId.current });
       // Remove angle brackets from bot response
       const cleanResponse = res.data.response.replace(/[<>]/g, "");
       const botMsg = { role: "assistant", content: cleanResponse };
@@ -0,0 +1,115 @@
+import sys
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any
+from langchain_core.documents import Document
+
+
+@lru_cache(maxsize=4)
+def get_tokenizer(name: str):
+    """
+    Load a Hugging Face fast tokenizer once per process.
+    Fast (Rust) tokenizers give character offsets and release the GIL while encoding.
+    """
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(name, use_fast=True)
+    if not tokenizer.is_fast:
+        raise ValueError(f"Tokenizer {name} has no fast implementation; offsets are required for chunking.")
+    # Some tokenizer.json files (e.g. sentence-transformers models) enable truncation/padding; the first
+    # call would then reconfigure the shared Rust tokenizer while other threads encode ("Already borrowed")
+    tokenizer.backend_tokenizer.no_truncation()
+    tokenizer.backend_tokenizer.no_padding()
+    return tokenizer
+
+
+class TokenChunker:
+    """
+    Split documents into windows of chunk_size tokens with chunk_overlap tokens of overlap.
+    Each chunk keeps the source metadata plus start_index/end_index (character offsets into the
+    source text) and chunk_index (ordinal of the chunk within its source document).
+    """
+
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 64, tokenizer_name: str = "gpt2", batch_size: int = 64, max_workers: int = 4):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer_name = tokenizer_name
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+    def _chunk_batch(self, documents: List[Any]) -> List[Any]:
+        tokenizer = get_tokenizer(self.tokenizer_name)
+        texts = [doc.page_content for doc in documents]
+        encoded = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True, return_attention_mask=False, verbose=False)
+        step = self.chunk_size - self.chunk_overlap
+        chunks = []
+        for doc, text, offsets in zip(documents, texts, encoded["offset_mapping"]):
+            n_tokens = len(offsets)
+            if n_tokens == 0:
+                continue
+            chunk_index = 0
+            for start in range(0, n_tokens, step):
+                end = min(start + self.chunk_size, n_tokens)
+                start_char = offsets[start][0]
+                end_char = offsets[end - 1][1]
+                meta = dict(doc.metadata)
+                meta["start_index"] = start_char
+                meta["end_index"] = end_char
+                meta["chunk_index"] = chunk_index
+                chunks.append(Document(page_content=text[start_char:end_char], metadata=meta))
+                chunk_index += 1
+                if end == n_tokens:
+                    break
+        return chunks
+
+    def split_documents(self, documents: List[Any]) -> List[Any]:
+        batches = [documents[i:i + self.batch_size] for i in range(0, len(documents), self.batch_size)]
+        if len(batches) <= 1 or self.max_workers <= 1:
+            results = [self._chunk_batch(b) for b in batches]
+        else:
+            # Warm the tokenizer cache before fanning out so workers do not all load it
+            get_tokenizer(self.tokenizer_name)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(pool.map(self._chunk_batch, batches))
+        return [chunk for batch in results for chunk in batch]
+
+
+def benchmark_chunkers(documents: List[Any], chunk_size: int = 512, chunk_overlap: int = 64, char_chunk_size: int = 1000, char_chunk_overlap: int = 200, repeats: int = 3) -> dict:
+    """
+    Compare docs/s of TokenChunker against the RecursiveCharacterTextSplitter used by EmbeddingPipeline.
+    Returns the best-of-N throughput and chunk counts for each.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitters = {
+        "recursive_character": RecursiveCharacterTextSplitter(
+            chunk_size=char_chunk_size,
+            chunk_overlap=char_chunk_overlap,
+            length_function=len,
+            separators=["\n\n", "\n", " ", ""]
+        ),
+        "token": TokenChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap),
+    }
+    # Load the tokenizer outside the timed region
+    get_tokenizer(splitters["token"].tokenizer_name)
+    report = {}
+    for name, splitter in splitters.items():
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            chunks = splitter.split_documents(documents)
+            best = min(best, time.perf_counter() - start)
+        report[name] = {"docs_per_s": round(len(documents) / best, 1) if best > 0 else float("inf"), "chunks": len(chunks), "seconds": round(best, 4)}
+        print(f"[INFO] {name}: {report[name]['docs_per_s']} docs/s, {len(chunks)} chunks, {best:.4f}s")
+    return report
+
+
+# Benchmark usage: python -m src.chunking data/uploaded
+if __name__ == "__main__":
+    from src.data_loader import load_all_documents
+    docs = load_all_documents(sys.argv[1] if len(sys.argv) > 1 else "data/uploaded")
+    if docs:
+        benchmark_chunkers(docs)
+    else:
+        print("[INFO] No documents found to benchmark.")
@@ -0,0 +1,40 @@
+import os
+from dotenv import load_dotenv
+
+# Environment settings shared by api.py and the command-line tools
+load_dotenv()
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+
+def _env_list(name: str):
+    return [f.strip() for f in os.getenv(name, "").split(",") if f.strip()]
+
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "bedrock")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL") or None
+# torch.set_num_threads is process-wide, so one setting covers local embeddings and the reranker
+# (and the ONNX Runtime session when EMBEDDING_ONNX is set)
+CPU_THREADS = int(os.getenv("CPU_THREADS", "0")) or None
+BACKEND_OPTIONS = {"num_threads": CPU_THREADS, "onnx": _env_flag("EMBEDDING_ONNX")} if EMBEDDING_BACKEND == "local" else {}
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "character")
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "512" if CHUNK_STRATEGY == "token" else "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "64" if CHUNK_STRATEGY == "token" else "200"))
+# Field mapping for structured .jsonl/.csv uploads (comma separated; empty text fields = all fields)
+RECORD_TEXT_FIELDS = _env_list("RECORD_TEXT_FIELDS") or None
+RECORD_METADATA_FIELDS = _env_list("RECORD_METADATA_FIELDS")
+RAG_RERANK = _env_flag("RAG_RERANK")
+RAG_ROUTING = _env_flag("RAG_ROUTING")
+RAG_ROUTE_CLASSIFIER = _env_flag("RAG_ROUTE_CLASSIFIER")
+SMALL_LLM_MODEL = os.getenv("SMALL_LLM_MODEL") or None
+
+
+def make_vectorstore(persist_dir: str = "faiss_store"):
+    """
+    FaissVectorStore configured from the environment settings above.
+    """
+    from src.vectorstore import FaissVectorStore
+    return FaissVectorStore(persist_dir, EMBEDDING_MODEL, embedding_backend=EMBEDDING_BACKEND, backend_options=BACKEND_OPTIONS,
+                            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, chunk_strategy=CHUNK_STRATEGY)
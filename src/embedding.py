@@ -3,45 +3,74 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 import numpy as np
 import os, shutil
 from src.data_loader import load_all_documents
-from langchain_aws import BedrockEmbeddings
+from src.chunking import TokenChunker
+from src.embedding_backends import get_embedding_backend
 from tqdm import tqdm
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
 
 class EmbeddingPipeline:
-    def __init__(self, model_id: str = "amazon.titan-embed-text-v2:0", chunk_size: int = 1000, chunk_overlap: int = 200, region_name: str = "us-east-1"):
+    def __init__(self, model_id: str = None, chunk_size: int = 1000, chunk_overlap: int = 200, region_name: str = "us-east-1", backend: Any = "bedrock", chunk_strategy: str = "character", tokenizer_name: str = None):
+        # chunk_strategy "character": sizes in characters (RecursiveCharacterTextSplitter)
+        # chunk_strategy "token": sizes in tokens with offset metadata (TokenChunker)
+        if chunk_strategy not in ("character", "token"):
+            raise ValueError(f"Unknown chunk_strategy: {chunk_strategy!r} (expected 'character' or 'token')")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.model_id = model_id
+        self.chunk_strategy = chunk_strategy
         self.region_name = region_name
-        self.embedder = BedrockEmbeddings(model_id=self.model_id, region_name=self.region_name)
-        print(f"[INFO] Using LangChain BedrockEmbeddings model: {model_id}")
+        # Accept either a backend name or an already constructed backend (shared with the vector store)
+        if isinstance(backend, str):
+            backend = get_embedding_backend(backend, model_id=model_id, region_name=region_name)
+        self.backend = backend
+        self.model_id = backend.model_id
+        # Local models: count tokens with the model's own tokenizer and never exceed what it can embed,
+        # otherwise the tail of every chunk is silently truncated
+        max_tokens = getattr(backend, "max_tokens", None)
+        self.tokenizer_name = tokenizer_name or (backend.model_id if max_tokens else "gpt2")
+        if chunk_strategy == "token" and max_tokens and self.chunk_size > max_tokens:
+            print(f"[INFO] Capping chunk_size {self.chunk_size} -> {max_tokens} tokens (max input of {backend.model_id})")
+            self.chunk_size = max_tokens
+            self.chunk_overlap = min(self.chunk_overlap, max_tokens // 4)
 
     def chunk_documents(self, documents: List[Any]) -> List[Any]:
+        if self.chunk_strategy == "token":
+            chunks = TokenChunker(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, tokenizer_name=self.tokenizer_name).split_documents(documents)
+            print(f"[INFO] Split {len(documents)} documents into {len(chunks)} token chunks.")
+            return chunks
         splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
             length_function=len,
-            separators=["\n\n", "\n", " ", ""]
+            separators=["\n\n", "\n", " ", ""],
+            add_start_index=True
         )
         chunks = splitter.split_documents(documents)
+        # Same offset/ordinal metadata as TokenChunker; chunks of one document are contiguous
+        previous_key, chunk_index = None, 0
+        for chunk in chunks:
+            key = (chunk.metadata.get("source"), chunk.metadata.get("page"))
+            chunk_index = chunk_index + 1 if key == previous_key else 0
+            previous_key = key
+            chunk.metadata["end_index"] = chunk.metadata["start_index"] + len(chunk.page_content)
+            chunk.metadata["chunk_index"] = chunk_index
         print(f"[INFO] Split {len(documents)} documents into {len(chunks)} chunks.")
         return chunks
 
     def embed_chunks(self, chunks: List[Any], move_files: bool = True, uploaded_dir: str = "data/uploaded", embedded_dir: str = "data/embedded", batch_size: int = 32) -> np.ndarray:
         
         texts = [chunk.page_content for chunk in chunks]
-        print(f"[INFO] Generating embeddings for {len(texts)} chunks using LangChain BedrockEmbeddings (batch size={batch_size})...")
+        print(f"[INFO] Generating embeddings for {len(texts)} chunks using {self.backend.name} backend (batch size={batch_size})...")
         if len(texts) == 0:
             print("[INFO] No chunks to embed. Returning empty array.")
             return np.array([])
         embeddings = []
         for i in tqdm(range(0, len(texts), batch_size), desc="Embedding batches"):
             batch = texts[i:i+batch_size]
-            batch_embeds = self.embedder.embed_documents(batch)
-            embeddings.extend(batch_embeds)
-        embeddings = np.stack(embeddings)
+            batch_embeds = self.backend.embed_documents(batch)
+            embeddings.append(batch_embeds)
+        embeddings = np.concatenate(embeddings)
         print(f"[INFO] Embeddings shape: {embeddings.shape}")
         if move_files:
             self.move_uploaded_to_embedded(uploaded_dir, embedded_dir)
@@ -0,0 +1,127 @@
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Optional
+import numpy as np
+
+DEFAULT_EMBEDDING_MODELS = {
+    "bedrock": "amazon.titan-embed-text-v2:0",
+    "local": "sentence-transformers/all-MiniLM-L6-v2",
+}
+
+
+class BedrockEmbeddingBackend:
+    """
+    Remote embeddings through Amazon Bedrock. Documents go through LangChain BedrockEmbeddings,
+    single queries through a direct invoke_model call.
+    """
+    name = "bedrock"
+
+    def __init__(self, model_id: str = DEFAULT_EMBEDDING_MODELS["bedrock"], region_name: str = "us-east-1"):
+        import boto3
+        from langchain_aws import BedrockEmbeddings
+        self.model_id = model_id
+        self.region_name = region_name
+        self.embedder = BedrockEmbeddings(model_id=self.model_id, region_name=self.region_name)
+        self.bedrock = boto3.client("bedrock-runtime", region_name=self.region_name)
+        print(f"[INFO] Using LangChain BedrockEmbeddings model: {model_id}")
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return np.array(self.embedder.embed_documents(texts), dtype="float32")
+
+    def embed_query(self, text: str) -> np.ndarray:
+        response = self.bedrock.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({"inputText": text}).encode("utf-8")
+        )
+        response_body = json.loads(response["body"].read())
+        return np.array(response_body["embedding"], dtype="float32")
+
+
+class LocalEmbeddingBackend:
+    """
+    Offline CPU embeddings with sentence-transformers (PyTorch or ONNX Runtime).
+    Concurrent embed_query calls are coalesced into one forward pass by a QueryBatcher.
+    """
+    name = "local"
+
+    def __init__(self, model_id: str = DEFAULT_EMBEDDING_MODELS["local"], num_threads: Optional[int] = None, onnx: bool = False, batch_size: int = 64, max_query_batch: int = 32, max_wait_ms: float = 5.0):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model_id = model_id
+        self.batch_size = batch_size
+        if onnx:
+            # ONNX Runtime reads its intra-op thread count from the session, torch threads do not apply
+            model_kwargs = {"provider": "CPUExecutionProvider"}
+            if num_threads:
+                import onnxruntime
+                session_options = onnxruntime.SessionOptions()
+                session_options.intra_op_num_threads = num_threads
+                model_kwargs["session_options"] = session_options
+            self.model = SentenceTransformer(model_id, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+        else:
+            self.model = SentenceTransformer(model_id, device="cpu")
+        # Longest chunk (in the model's own tokens) embedded without truncation
+        self.max_tokens = self.model.max_seq_length - self.model.tokenizer.num_special_tokens_to_add()
+        self.batcher = QueryBatcher(self.embed_documents, max_batch_size=max_query_batch, max_wait_ms=max_wait_ms)
+        print(f"[INFO] Using local embedding model: {model_id} (onnx={onnx}, threads={num_threads or torch.get_num_threads()})")
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.model.encode(texts, batch_size=self.batch_size, show_progress_bar=False, convert_to_numpy=True)
+        return embeddings.astype("float32")
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.batcher.submit(text)
+
+
+class QueryBatcher:
+    """
+    Dynamic batching for query embeddings: requests arriving from different threads within
+    max_wait_ms of each other are embedded together, up to max_batch_size at a time.
+    """
+
+    def __init__(self, embed_fn, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> np.ndarray:
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.append(self._queue.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = self.embed_fn(texts)
+                for (_, future), emb in zip(batch, embeddings):
+                    future.set_result(emb)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+def get_embedding_backend(backend: str = "bedrock", model_id: Optional[str] = None, region_name: str = "us-east-1", **kwargs):
+    """
+    Build an embedding backend by name ("bedrock" or "local").
+    Extra keyword arguments are passed to the local backend (num_threads, onnx, ...).
+    """
+    model_id = model_id or DEFAULT_EMBEDDING_MODELS.get(backend)
+    if backend == "bedrock":
+        return BedrockEmbeddingBackend(model_id=model_id, region_name=region_name)
+    if backend == "local":
+        return LocalEmbeddingBackend(model_id=model_id, **kwargs)
+    raise ValueError(f"Unknown embedding backend: {backend!r} (expected one of {sorted(DEFAULT_EMBEDDING_MODELS)})")
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import List, Any, Optional
+from langchain_core.documents import Document
+from src.data_loader import PARSER_VERSION, load_all_documents
+
+
+class ParsedDocumentCache:
+    """
+    Persistent cache of parsed file text, keyed by file content hash and PARSER_VERSION.
+    Each file is stored as one gzip-compressed JSON array of pages (text + metadata), and
+    index.json maps source file names to their hash, size and mtime so unchanged files
+    (including ones moved to data/embedded) are not even re-hashed.
+    """
+
+    def __init__(self, cache_dir: str = "parse_cache"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.index = {}
+        self._hashes = {}
+        if self.index_path.exists():
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def _file_hash(self, path: Path) -> str:
+        # Reuse the stored hash when size and mtime are unchanged (shutil.move keeps both)
+        stat = path.stat()
+        entry = self.index.get(path.name)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        if key not in self._hashes:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+            self._hashes[key] = h.hexdigest()
+        return self._hashes[key]
+
+    def _entry_path(self, sha256: str, suffix: str) -> Path:
+        return self.cache_dir / f"{sha256}-{suffix.lstrip('.')}-v{PARSER_VERSION}.json.gz"
+
+    def _read(self, entry_path: Path) -> List[Any]:
+        with gzip.open(entry_path, "rt", encoding="utf-8") as f:
+            pages = json.load(f)
+        return [Document(page_content=p["text"], metadata=p["metadata"]) for p in pages]
+
+    def get(self, path: Path) -> Optional[List[Any]]:
+        path = Path(path)
+        sha256 = self._file_hash(path)
+        entry_path = self._entry_path(sha256, path.suffix)
+        if not entry_path.exists():
+            return None
+        docs = self._read(entry_path)
+        # Same content may have been cached under another name; report the current one
+        for doc in docs:
+            doc.metadata["source"] = path.name
+        self._record(path, sha256)
+        return docs
+
+    def put(self, path: Path, documents: List[Any]):
+        path = Path(path)
+        sha256 = self._file_hash(path)
+        entry_path = self._entry_path(sha256, path.suffix)
+        pages = [{"text": d.page_content, "metadata": dict(d.metadata)} for d in documents]
+        tmp_path = entry_path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(pages, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, entry_path)
+        self._record(path, sha256)
+
+    def _record(self, path: Path, sha256: str):
+        stat = path.stat()
+        entry = {"sha256": sha256, "suffix": path.suffix, "parser_version": PARSER_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if self.index.get(path.name) != entry:
+            self.index[path.name] = entry
+            self._save_index()
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+
+def rebuild_index_from_cache(store: Any, cache: ParsedDocumentCache, record_dir: str = "data/embedded", text_fields: List[str] = None, metadata_fields: List[str] = None):
+    """
+    Replace the store's index with a fresh one built from every file in record_dir (documents
+    plus .jsonl/.csv records), using the store's current chunking and embedding settings.
+    Documents already in the cache are not parsed again; missing or stale entries are parsed
+    once and cached. No files are moved.
+    The new index is built in a sibling directory and swapped in only when complete, so readers
+    never see a partial index and a failed rebuild leaves the old one in place.
+    Returns the number of vectors, or 0 (old index untouched) if record_dir holds nothing to index.
+    """
+    docs = load_all_documents(record_dir, cache=cache)
+    record_files = sorted(Path(record_dir).glob("*.jsonl")) + sorted(Path(record_dir).glob("*.csv"))
+    if not docs and not record_files:
+        print(f"[INFO] Nothing to rebuild: no documents or record files in {record_dir}. Existing index left unchanged.")
+        return 0
+
+    persist_dir = store.persist_dir.rstrip("/\\")
+    build_dir = persist_dir + ".rebuild"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    store.persist_dir = build_dir
+    store.index = None
+    store.metadata = []
+    try:
+        store.build_from_documents(docs, move_files=False)
+        for record_file in record_files:
+            store.build_from_records(str(record_file), text_fields, metadata_fields)
+        if store.index is None:
+            raise RuntimeError(f"Rebuild produced no vectors from {record_dir}")
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    finally:
+        store.persist_dir = persist_dir
+
+    # Swap directories; os.replace cannot overwrite a non-empty directory, so move the old one aside first
+    old_dir = persist_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(persist_dir):
+        os.replace(persist_dir, old_dir)
+    os.replace(build_dir, persist_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"[INFO] Rebuilt index in {persist_dir} with {store.index.ntotal} vectors")
+    return store.index.ntotal
+
+
+# Usage: python -m src.parse_cache rebuild [cache_dir] [persist_dir]
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python -m src.parse_cache rebuild [cache_dir] [persist_dir]")
+        sys.exit(1)
+    from src.config import make_vectorstore, RECORD_TEXT_FIELDS, RECORD_METADATA_FIELDS
+    cache = ParsedDocumentCache(sys.argv[2] if len(sys.argv) > 2 else "parse_cache")
+    store = make_vectorstore(sys.argv[3] if len(sys.argv) > 3 else "faiss_store")
+    rebuild_index_from_cache(store, cache, text_fields=RECORD_TEXT_FIELDS, metadata_fields=RECORD_METADATA_FIELDS)
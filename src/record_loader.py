@@ -0,0 +1,88 @@
+import csv
+import json
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Metadata keys set by the loader or used for citations; mapped fields may not overwrite them
+RESERVED_METADATA_FIELDS = ("source", "row", "page", "text")
+
+
+def _get_field(record: dict, field: str) -> Any:
+    # Dotted names reach into nested objects, e.g. "author.name"
+    value = record
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, list):
+        return ", ".join(str(v).strip() for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+
+def _iter_raw_records(path: Path) -> Iterator[Tuple[int, dict]]:
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8", errors="ignore") as f:
+            for row_no, row in enumerate(csv.DictReader(f), start=1):
+                yield row_no, row
+        return
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for row_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"[ERROR] Skipping malformed JSON on line {row_no} of {path.name}: {e}")
+                continue
+            if isinstance(record, dict):
+                yield row_no, record
+
+
+def stream_records(file_path: str, text_fields: Optional[List[str]] = None, metadata_fields: Optional[List[str]] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    Stream (text, metadata) pairs from a JSONL or CSV file one record at a time.
+    text_fields become the embedded text as "field: value" lines (all fields if None);
+    metadata_fields are copied into the metadata for filtering alongside source/row.
+    """
+    reserved = sorted(set(metadata_fields or []) & set(RESERVED_METADATA_FIELDS))
+    if reserved:
+        raise ValueError(f"Metadata fields {reserved} are reserved ({', '.join(RESERVED_METADATA_FIELDS)}); rename them in the mapping.")
+    path = Path(file_path)
+    for row_no, record in _iter_raw_records(path):
+        fields = text_fields or list(record.keys())
+        lines = []
+        for field in fields:
+            value = _get_field(record, field)
+            if value is None or value == "":
+                continue
+            lines.append(f"{field}: {_format_value(value)}")
+        if not lines:
+            continue
+        metadata = {"source": path.name, "row": row_no}
+        for field in metadata_fields or []:
+            value = _get_field(record, field)
+            if value is not None:
+                metadata[field] = value
+        yield "\n".join(lines), metadata
+
+
+def iter_record_batches(file_path: str, text_fields: Optional[List[str]] = None, metadata_fields: Optional[List[str]] = None, batch_size: int = 256) -> Iterator[Tuple[List[str], List[dict]]]:
+    """
+    Group stream_records output into (texts, metadatas) batches ready for the embedding backend.
+    """
+    texts, metadatas = [], []
+    for text, metadata in stream_records(file_path, text_fields, metadata_fields):
+        texts.append(text)
+        metadatas.append(metadata)
+        if len(texts) >= batch_size:
+            yield texts, metadatas
+            texts, metadatas = [], []
+    if texts:
+        yield texts, metadatas
@@ -0,0 +1,121 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Any, Optional, Tuple
+
+
+class CrossEncoderReranker:
+    """
+    Re-score FAISS candidates with a local CPU cross-encoder and keep only the best few.
+    Scores are cached per (query, chunk text) so repeated questions skip inference.
+    Safe to share between request threads. num_threads: see CPU_THREADS in src/config.py.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 16, num_threads: Optional[int] = None, cache_size: int = 4096, max_length: int = 512):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.cache_size = cache_size
+        self.max_length = max_length
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.last_stats = {}
+        self.totals = {"calls": 0, "latency_ms": 0.0, "cache_hits": 0, "prompt_tokens_saved": 0}
+
+    def _load_model(self):
+        if self._model is not None:
+            return self._model
+        with self._model_lock:
+            if self._model is not None:
+                return self._model
+            import torch
+            from sentence_transformers import CrossEncoder
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            model = CrossEncoder(self.model_name, device="cpu", max_length=self.max_length)
+            print(f"[INFO] Loaded cross-encoder reranker: {self.model_name} (threads={torch.get_num_threads()})")
+            self._model = model
+        return self._model
+
+    def score(self, query: str, texts: List[str]) -> Tuple[List[float], int]:
+        """
+        Cross-encoder scores for (query, text) pairs; returns (scores, number of cache hits).
+        """
+        scores = [None] * len(texts)
+        missing = []
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                cached = self._cache.get((query, text))
+                if cached is not None:
+                    self._cache.move_to_end((query, text))
+                    scores[i] = cached
+                else:
+                    missing.append(i)
+        cache_hits = len(texts) - len(missing)
+        if missing:
+            # Inference runs outside the lock so other requests can still read the cache
+            model = self._load_model()
+            pairs = [(query, texts[i]) for i in missing]
+            predicted = model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            with self._cache_lock:
+                for i, s in zip(missing, predicted):
+                    scores[i] = float(s)
+                    self._cache[(query, texts[i])] = scores[i]
+                    self._cache.move_to_end((query, texts[i]))
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores, cache_hits
+
+    def rerank(self, query: str, results: List[Any], top_n: int = 3) -> List[Any]:
+        """
+        Sort FAISS results by cross-encoder score and return the top_n.
+        Each kept result gets a "rerank_score" key. Per-call stats go to last_stats (most recent
+        call from any thread) and are accumulated in totals.
+        """
+        if not results:
+            return results
+        start = time.perf_counter()
+        texts = [(r.get("metadata") or {}).get("text", "") for r in results]
+        scores, cache_hits = self.score(query, texts)
+        ranked = sorted(zip(scores, range(len(results))), key=lambda x: x[0], reverse=True)[:top_n]
+        reranked = []
+        for s, i in ranked:
+            r = dict(results[i])
+            r["rerank_score"] = s
+            reranked.append(r)
+        latency_ms = (time.perf_counter() - start) * 1000
+        candidate_tokens = sum(estimate_tokens(t) for t in texts)
+        kept_tokens = sum(estimate_tokens(texts[i]) for _, i in ranked)
+        call_stats = {
+            "candidates": len(results),
+            "kept": len(reranked),
+            "cache_hits": cache_hits,
+            "latency_ms": round(latency_ms, 2),
+            "candidate_tokens": candidate_tokens,
+            "kept_tokens": kept_tokens,
+            "prompt_tokens_saved": candidate_tokens - kept_tokens,
+        }
+        with self._stats_lock:
+            self.last_stats = call_stats
+            self.totals["calls"] += 1
+            self.totals["latency_ms"] += latency_ms
+            self.totals["cache_hits"] += cache_hits
+            self.totals["prompt_tokens_saved"] += call_stats["prompt_tokens_saved"]
+        print(f"[INFO] Reranked {len(results)} -> {len(reranked)} chunks in {latency_ms:.1f} ms "
+              f"(cache hits={cache_hits}, ~{candidate_tokens - kept_tokens} prompt tokens saved)")
+        return reranked
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            totals = dict(self.totals)
+            totals["avg_latency_ms"] = round(totals["latency_ms"] / totals["calls"], 2) if totals["calls"] else 0.0
+            totals["latency_ms"] = round(totals["latency_ms"], 2)
+            return {"totals": totals, "last_call": dict(self.last_stats)}
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough Bedrock-style estimate (~4 characters per token) without loading a tokenizer
+    return (len(text) + 3) // 4
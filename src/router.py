@@ -0,0 +1,158 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from src.rerank import estimate_tokens
+
+# Route names
+DIRECT = "direct"   # no retrieval, short reply from the small model (greetings, thanks, chit-chat)
+SIMPLE = "simple"   # retrieval + small/fast model (short factual lookups)
+FULL = "full"       # retrieval + main model (comparisons, explanations, long or multi-part questions)
+FOLLOW_UP = "follow_up"  # no retrieval, main model reuses the previous turn's retrieved context
+ROUTES = (DIRECT, SIMPLE, FULL, FOLLOW_UP)
+RETRIEVAL_ROUTES = (SIMPLE, FULL)
+
+# USD per 1K input/output tokens (on-demand, us-east-1); unknown models are counted with zero cost
+BEDROCK_PRICES = {
+    "amazon.nova-micro-v1:0": (0.000035, 0.00014),
+    "amazon.nova-lite-v1:0": (0.00006, 0.00024),
+    "amazon.nova-pro-v1:0": (0.0008, 0.0032),
+    "amazon.titan-embed-text-v2:0": (0.00002, 0.0),
+}
+
+_SMALL_TALK = re.compile(
+    r"^\s*(hi|hello|hey|hiya|yo|good (morning|afternoon|evening)|thanks|thank you|thx|cheers|ok(ay)?|cool|great|nice|"
+    r"bye|goodbye|see you|who are you|what are you|what can you do|how are you)\b[\s!.?,]*"
+    r"(there|again|so much|a lot|bot|assistant)?[\s!.?]*$",
+    re.IGNORECASE,
+)
+# Only explicit follow-up openers count; a bare pronoun ("Who signed that contract?") is a new question
+_FOLLOW_UP_START = re.compile(
+    r"^\s*((and|also|what about|how about|then what|tell me more|more on|elaborate|expand on|can you elaborate|"
+    r"which one|what else)\b|(why( is that| not)?|the (first|second|third|last|other|previous) (one|point|item))\s*\??\s*$)",
+    re.IGNORECASE,
+)
+_COMPLEX_MARKERS = re.compile(
+    r"\b(compare|comparison|difference|differences|versus|vs\.?|why|explain|summari[sz]e|summary|analy[sz]e|"
+    r"pros and cons|advantages|disadvantages|step by step|list all|in detail|relationship between)\b",
+    re.IGNORECASE,
+)
+
+
+class PrototypeRouteClassifier:
+    """
+    Small local classifier: embeds the query with a CPU sentence-transformers model and picks the
+    route whose example centroid is most similar. Only consulted when the rules are undecided.
+    """
+
+    DEFAULT_EXAMPLES = {
+        DIRECT: ["hello", "thanks for the help", "what can you do?", "good morning", "ok got it"],
+        SIMPLE: ["what is the notice period?", "who is the author?", "when was it published?", "what is the leave policy?"],
+        FULL: ["compare the two contracts", "explain how the process works end to end", "summarize the main findings of the report",
+               "what are the differences between plan A and plan B and which is better?"],
+    }
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", examples: Optional[Dict[str, List[str]]] = None):
+        self.model_name = model_name
+        self.examples = examples or self.DEFAULT_EXAMPLES
+        self._model = None
+        self._centroids = None
+
+    def _load(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+            labels = list(self.examples)
+            centroids = []
+            for label in labels:
+                emb = self._model.encode(self.examples[label], normalize_embeddings=True, show_progress_bar=False)
+                c = emb.mean(axis=0)
+                centroids.append(c / np.linalg.norm(c))
+            self._centroids = (labels, np.stack(centroids))
+            print(f"[INFO] Loaded route classifier: {self.model_name}")
+
+    def __call__(self, query: str) -> Tuple[str, float]:
+        self._load()
+        labels, centroids = self._centroids
+        q = self._model.encode([query], normalize_embeddings=True, show_progress_bar=False)[0]
+        sims = centroids @ q
+        best = int(np.argmax(sims))
+        return labels[best], float(sims[best])
+
+
+class QueryRouter:
+    """
+    Decide per query whether retrieval is needed and which model should answer.
+    Rules run first; an optional classifier (callable returning (route, confidence)) breaks ties.
+    Short follow-ups ("and the second one?") reuse the previous turn's context when there is one.
+    Keeps per-route counters for calls, latency, tokens and estimated Bedrock cost, including the
+    query embedding paid by retrieval routes.
+    """
+
+    def __init__(self, classifier: Optional[Callable[[str], Tuple[str, float]]] = None, min_confidence: float = 0.5, simple_max_words: int = 12, full_min_words: int = 30):
+        self.classifier = classifier
+        self.min_confidence = min_confidence
+        self.simple_max_words = simple_max_words
+        self.full_min_words = full_min_words
+        self._lock = threading.Lock()
+        self._stats = {route: {"calls": 0, "latency_ms": 0.0, "input_tokens": 0, "output_tokens": 0, "embedding_tokens": 0, "cost_usd": 0.0} for route in ROUTES}
+
+    def _rule_route(self, query: str, has_history: bool = False) -> Optional[str]:
+        n_words = len(query.split())
+        if n_words == 0 or _SMALL_TALK.match(query):
+            return DIRECT
+        if has_history and n_words <= self.simple_max_words // 2 and _FOLLOW_UP_START.match(query):
+            return FOLLOW_UP
+        if _COMPLEX_MARKERS.search(query) or n_words >= self.full_min_words or query.count("?") > 1:
+            return FULL
+        if n_words <= self.simple_max_words // 2:
+            return SIMPLE
+        return None
+
+    def route(self, query: str, has_history: bool = False) -> str:
+        """
+        has_history: whether a previous turn with retrieved context exists (enables FOLLOW_UP).
+        """
+        route = self._rule_route(query, has_history)
+        if route is None and self.classifier is not None:
+            try:
+                label, confidence = self.classifier(query)
+                if label in (DIRECT, SIMPLE, FULL) and confidence >= self.min_confidence:
+                    route = label
+            except Exception as e:
+                print(f"[ERROR] Route classifier failed, falling back to rules: {e}")
+        if route is None:
+            route = SIMPLE if len(query.split()) <= self.simple_max_words else FULL
+        print(f"[INFO] Routed query to '{route}'")
+        return route
+
+    def record(self, route: str, latency_ms: float, model_id: Optional[str] = None, prompt: str = "", response=None, answer: str = "", embedding_model: Optional[str] = None, query: str = ""):
+        """
+        Add one call to the route counters. Token counts come from the LLM response usage metadata
+        when available, otherwise they are estimated from the prompt/answer length.
+        embedding_model is set when the query was embedded for retrieval; its tokens are estimated from the query.
+        """
+        usage = getattr(response, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens") or (estimate_tokens(prompt) if prompt else 0)
+        output_tokens = usage.get("output_tokens") or (estimate_tokens(answer) if response is not None else 0)
+        in_price, out_price = BEDROCK_PRICES.get(model_id, (0.0, 0.0))
+        embedding_tokens = estimate_tokens(query) if embedding_model else 0
+        embedding_price = BEDROCK_PRICES.get(embedding_model, (0.0, 0.0))[0]
+        with self._lock:
+            s = self._stats[route]
+            s["calls"] += 1
+            s["latency_ms"] += latency_ms
+            s["input_tokens"] += input_tokens
+            s["output_tokens"] += output_tokens
+            s["embedding_tokens"] += embedding_tokens
+            s["cost_usd"] += input_tokens / 1000 * in_price + output_tokens / 1000 * out_price + embedding_tokens / 1000 * embedding_price
+
+    def stats(self) -> dict:
+        with self._lock:
+            report = {}
+            for route, s in self._stats.items():
+                report[route] = dict(s)
+                report[route]["avg_latency_ms"] = round(s["latency_ms"] / s["calls"], 2) if s["calls"] else 0.0
+                report[route]["latency_ms"] = round(s["latency_ms"], 2)
+                report[route]["cost_usd"] = round(s["cost_usd"], 6)
+            return report
@@ -1,8 +1,12 @@
 import os
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from dotenv import load_dotenv
 from src.vectorstore import FaissVectorStore
-from src.data_loader import load_all_documents
+from src.rerank import CrossEncoderReranker
+from src.router import QueryRouter, PrototypeRouteClassifier, DIRECT, SIMPLE, FOLLOW_UP, RETRIEVAL_ROUTES
 from langchain_aws import ChatBedrock
 import boto3  # if you need it elsewhere; not strictly required here
 
@@ -13,17 +17,31 @@ class RAGSearch:
     def __init__(
         self,
         persist_dir: str = "faiss_store",
-        embedding_model: str = "amazon.titan-embed-text-v2:0",
+        embedding_model: str = None,
         llm_model: str = "amazon.nova-micro-v1:0",
+        rerank: bool = False,
+        rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        rerank_candidates: int = 20,
+        rerank_threads: int = None,
+        embedding_backend: str = "bedrock",
+        backend_options: dict = None,
+        routing: bool = False,
+        small_llm_model: str = None,
+        route_classifier: bool = False,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        chunk_strategy: str = "character",
+        record_text_fields: list = None,
+        record_metadata_fields: list = None,
     ):
-        self.vectorstore = FaissVectorStore(persist_dir, embedding_model)
+        self.vectorstore = FaissVectorStore(persist_dir, embedding_model, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                            embedding_backend=embedding_backend, backend_options=backend_options, chunk_strategy=chunk_strategy)
 
         # Load or build vectorstore
         faiss_path = os.path.join(persist_dir, "faiss.index")
         meta_path = os.path.join(persist_dir, "metadata.pkl")
         if not (os.path.exists(faiss_path) and os.path.exists(meta_path)):
-            docs = load_all_documents("data/uploaded")
-            self.vectorstore.build_from_documents(docs)
+            self.vectorstore.ingest_directory("data/uploaded", "data/embedded", record_text_fields, record_metadata_fields)
         else:
             self.vectorstore.load()
 
@@ -34,6 +52,29 @@ class RAGSearch:
         )
         print(f"[INFO] Amazon Bedrock LLM initialized: {llm_model}")
 
+        # Optional query routing: skip retrieval for small talk, send simple questions to a smaller model
+        self.llm_model = llm_model
+        self.small_llm_model = small_llm_model or llm_model
+        self.small_llm = self.llm
+        if small_llm_model and small_llm_model != llm_model:
+            self.small_llm = ChatBedrock(
+                model_id=small_llm_model,
+                region_name=os.getenv("AWS_REGION", "us-east-1"),
+            )
+            print(f"[INFO] Amazon Bedrock small LLM initialized: {small_llm_model}")
+        self.router = QueryRouter(classifier=PrototypeRouteClassifier() if route_classifier else None) if routing else None
+        # Per conversation: (query, retrieved results) of the last retrieval turn, reused by FOLLOW_UP queries.
+        # /chat runs in a threadpool, so access goes through _turns_lock; oldest conversations are evicted.
+        self._last_turns = OrderedDict()
+        self._turns_lock = threading.Lock()
+        self.max_sessions = 1000
+
+        # Optional local rerank stage: over-fetch from FAISS, keep only the best chunks for the prompt
+        self.rerank_candidates = rerank_candidates
+        self.reranker = CrossEncoderReranker(model_name=rerank_model, num_threads=rerank_threads) if rerank else None
+        if self.reranker:
+            print(f"[INFO] Reranking enabled: {rerank_model} (candidates={rerank_candidates})")
+
         # ---------------- Chat history setup ----------------
         chathistory_dir = "chathistory"
         os.makedirs(chathistory_dir, exist_ok=True)
@@ -59,6 +100,9 @@ class RAGSearch:
 
             if page is not None:
                 header = f"[Source: {file_name}, p.{page}]"
+            elif meta.get("row") is not None:
+                # Structured records (JSONL/CSV) are cited by row
+                header = f"[Source: {file_name}, row {meta['row']}]"
             else:
                 header = f"[Source: {file_name}]"
 
@@ -84,6 +128,9 @@ class RAGSearch:
             if page is not None:
                 key = (file_name, page)
                 label = f"{file_name}, p.{page}"
+            elif meta.get("row") is not None:
+                key = (file_name, f"row {meta['row']}")
+                label = f"{file_name}, row {meta['row']}"
             else:
                 key = (file_name, None)
                 label = f"{file_name}"
@@ -106,27 +153,90 @@ class RAGSearch:
         except Exception as e:
             print(f"[ERROR] Failed to write chat history: {e}")
 
-    def search_and_summarize(self, query: str, top_k: int = 5) -> str:
-        # Always reload index from disk before querying
-        try:
-            self.vectorstore.load()
-        except Exception as e:
-            print(f"[ERROR] Could not load FAISS index: {e}")
+    def _get_last_turn(self, session_id: str):
+        if session_id is None:
+            return None
+        with self._turns_lock:
+            return self._last_turns.get(session_id)
+
+    def _set_last_turn(self, session_id: str, turn):
+        if session_id is None:
+            return
+        with self._turns_lock:
+            if turn is None:
+                self._last_turns.pop(session_id, None)
+                return
+            self._last_turns[session_id] = turn
+            self._last_turns.move_to_end(session_id)
+            while len(self._last_turns) > self.max_sessions:
+                self._last_turns.popitem(last=False)
+
+    def _finish(self, query: str, answer: str, route: str, start: float, model_id: str = None, prompt: str = "", response=None) -> str:
+        """
+        Save the turn to chat history and, when routing is enabled, add it to the route counters.
+        """
+        self._append_to_history(query, answer)
+        if self.router:
+            embedding_model = self.vectorstore.embedding_model if route in RETRIEVAL_ROUTES else None
+            self.router.record(route, (time.perf_counter() - start) * 1000, model_id=model_id, prompt=prompt, response=response, answer=answer,
+                               embedding_model=embedding_model, query=query)
+        return answer
+
+    def _answer_direct(self, query: str, start: float) -> str:
+        prompt = f"""SYSTEM:
+You are the assistant of a document Q&A chatbot. Reply briefly and politely to the user's message.
+Do not make up facts. If the user asks about their documents, invite them to ask a specific question.
 
-        results = self.vectorstore.query(query, top_k=top_k)
+USER MESSAGE:
+{query}
+"""
+        response = self.small_llm.invoke(prompt)
+        answer_text = response.content if hasattr(response, "content") else str(response)
+        return self._finish(query, answer_text, DIRECT, start, self.small_llm_model, prompt, response)
+
+    def search_and_summarize(self, query: str, top_k: int = 5, metadata_filter: dict = None, session_id: str = None) -> str:
+        """
+        session_id identifies the conversation; follow-ups only reuse context from the same session
+        (without one, every query is treated as a new question).
+        """
+        start = time.perf_counter()
+        last_turn = self._get_last_turn(session_id)
+        route = self.router.route(query, has_history=last_turn is not None) if self.router else None
+        if route == DIRECT:
+            # Small talk ends the previous topic, so a later "why?" must not reuse its context
+            self._set_last_turn(session_id, None)
+            return self._answer_direct(query, start)
+        llm, llm_model = (self.small_llm, self.small_llm_model) if route == SIMPLE else (self.llm, self.llm_model)
+
+        if route == FOLLOW_UP:
+            # Reuse the previous turn's context instead of embedding and searching again
+            previous_query, results = last_turn
+            prompt_query = f"{previous_query}\nFOLLOW-UP: {query}"
+        else:
+            # Always reload index from disk before querying
+            try:
+                self.vectorstore.load()
+            except Exception as e:
+                print(f"[ERROR] Could not load FAISS index: {e}")
+
+            if self.reranker:
+                candidates = self.vectorstore.query(query, top_k=max(top_k, self.rerank_candidates), metadata_filter=metadata_filter)
+                results = self.reranker.rerank(query, candidates, top_n=top_k)
+            else:
+                results = self.vectorstore.query(query, top_k=top_k, metadata_filter=metadata_filter)
+            prompt_query = query
+            self._set_last_turn(session_id, (query, results) if results else None)
 
         if not results:
             answer = "No relevant documents found."
-            self._append_to_history(query, answer)
-            return answer
+            return self._finish(query, answer, route, start)
 
         # Build context including source + page
         context = self._format_context_with_sources(results)
 
         if not context.strip():
             answer = "No relevant documents found."
-            self._append_to_history(query, answer)
-            return answer
+            return self._finish(query, answer, route, start)
 
         prompt = f"""SYSTEM:
 You are a Retrieval-Augmented Q&A assistant. You must answer using ONLY the provided context.
@@ -145,11 +255,12 @@ Then, on a new line, write the sources in this exact format:
 OR
 - filename_1.ext, p.X
 - filename_2.ext, p.Y   (only for documents that actually support your answer)
+(write "row N" instead of "p.X" when the source header gives a row)
 
 You MUST NOT list any file in **Sources** if it did not directly support your answer.
 
 USER QUERY:
-{query}
+{prompt_query}
 
 RETRIEVED CONTEXT:
 {context}
@@ -160,13 +271,11 @@ Write a clear, concise answer following the rules above.
 """
 
 
-        response = self.llm.invoke(prompt)
+        response = llm.invoke(prompt)
         answer_text = response.content if hasattr(response, "content") else str(response)
 
-        # Save to chat history
-        self._append_to_history(query, answer_text)
-
-        return answer_text
+        # Save to chat history (and route counters)
+        return self._finish(query, answer_text, route, start, llm_model, prompt, response)
 
 
 # Example usage
@@ -1,37 +1,51 @@
 import os
+import shutil
+from pathlib import Path
 import faiss
 import numpy as np
 import pickle
 from typing import List, Any
-import boto3
 from src.embedding import EmbeddingPipeline
+from src.data_loader import load_all_documents
+from src.embedding_backends import get_embedding_backend, DEFAULT_EMBEDDING_MODELS
+from src.record_loader import iter_record_batches
 import json
 
 class FaissVectorStore: 
-    def __init__(self, persist_dir: str = "faiss_store", embedding_model: str = "amazon.titan-embed-text-v2:0", chunk_size: int = 1000, chunk_overlap: int = 200, region_name: str = "us-east-1",llm_model: str = "amazon.nova-micro-v1:0"):
+    def __init__(self, persist_dir: str = "faiss_store", embedding_model: str = None, chunk_size: int = 1000, chunk_overlap: int = 200, region_name: str = "us-east-1",llm_model: str = "amazon.nova-micro-v1:0", embedding_backend: str = "bedrock", backend_options: dict = None, chunk_strategy: str = "character"):
         self.persist_dir = persist_dir
         os.makedirs(self.persist_dir, exist_ok=True)
         self.index = None
         self.metadata = []
-        self.embedding_model = embedding_model
+        self.embedding_backend = embedding_backend
+        self.embedding_model = embedding_model or DEFAULT_EMBEDDING_MODELS.get(embedding_backend)
+        self.backend_options = backend_options or {}
         self.llm_model = llm_model
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunk_strategy = chunk_strategy
         self.region_name = region_name
-        self.bedrock = boto3.client("bedrock-runtime", region_name=self.region_name)
-        print(f"[INFO] Using Amazon Bedrock embedding model: {embedding_model}")
+        self._backend = None
+        print(f"[INFO] Using {embedding_backend} embedding model: {self.embedding_model}")
 
-    def build_from_documents(self, documents: List[Any]):
+    @property
+    def backend(self):
+        # Created on first use so constructing a store (e.g. per /embed_all call) stays cheap
+        if self._backend is None:
+            self._backend = get_embedding_backend(self.embedding_backend, model_id=self.embedding_model, region_name=self.region_name, **self.backend_options)
+        return self._backend
+
+    def build_from_documents(self, documents: List[Any], move_files: bool = True):
         if not documents or len(documents) == 0:
             print("[INFO] No documents provided. Skipping FAISS store build.")
             return
         print(f"[INFO] Building vector store from {len(documents)} raw documents...")
-        emb_pipe = EmbeddingPipeline(model_id=self.embedding_model, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, region_name=self.region_name)
+        emb_pipe = EmbeddingPipeline(model_id=self.embedding_model, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, region_name=self.region_name, backend=self.backend, chunk_strategy=self.chunk_strategy)
         chunks = emb_pipe.chunk_documents(documents)
         if not chunks or len(chunks) == 0:
             print("[INFO] No chunks generated from documents. Skipping FAISS store build.")
             return
-        embeddings = emb_pipe.embed_chunks(chunks)
+        embeddings = emb_pipe.embed_chunks(chunks, move_files=move_files)
         if embeddings is None or len(embeddings) == 0:
             print("[INFO] No embeddings generated. Skipping FAISS store build.")
             return
@@ -44,6 +58,46 @@ class FaissVectorStore:
         self.save()
         print(f"[INFO] Vector store built and saved to {self.persist_dir}")
 
+    def build_from_records(self, file_path: str, text_fields: List[str] = None, metadata_fields: List[str] = None, batch_size: int = 256):
+        """
+        Stream a JSONL/CSV file straight into the index: each record's mapped text fields are
+        embedded as one vector (no chunking), batch by batch, without building LangChain documents.
+        """
+        print(f"[INFO] Building vector store from records in {file_path} (batch size={batch_size})...")
+        total = 0
+        for texts, metadatas in iter_record_batches(file_path, text_fields, metadata_fields, batch_size=batch_size):
+            embeddings = self.backend.embed_documents(texts)
+            for meta, text in zip(metadatas, texts):
+                meta["text"] = text
+            self.add_embeddings(np.asarray(embeddings, dtype='float32'), metadatas)
+            total += len(texts)
+        if total == 0:
+            print(f"[INFO] No records found in {file_path}. Skipping FAISS store build.")
+            return
+        self.save()
+        print(f"[INFO] Indexed {total} records from {file_path} and saved to {self.persist_dir}")
+
+    def ingest_directory(self, upload_dir: str = "data/uploaded", embedded_dir: str = "data/embedded", text_fields: List[str] = None, metadata_fields: List[str] = None, cache: Any = None):
+        """
+        Index every document and .jsonl/.csv record file in upload_dir, then move the files to embedded_dir.
+        Files are only moved once everything has been indexed. Returns (documents, record files).
+        """
+        docs = load_all_documents(upload_dir, cache=cache)
+        record_files = sorted(Path(upload_dir).glob("*.jsonl")) + sorted(Path(upload_dir).glob("*.csv"))
+        if not docs and not record_files:
+            print(f"[INFO] No documents or record files in {upload_dir}.")
+            return 0, 0
+        self.build_from_documents(docs, move_files=False)
+        for record_file in record_files:
+            self.build_from_records(str(record_file), text_fields, metadata_fields)
+        os.makedirs(embedded_dir, exist_ok=True)
+        for filename in os.listdir(upload_dir):
+            src = os.path.join(upload_dir, filename)
+            if os.path.isfile(src):
+                shutil.move(src, os.path.join(embedded_dir, filename))
+        print(f"[INFO] Moved files from {upload_dir} to {embedded_dir}")
+        return len(docs), len(record_files)
+
     def add_embeddings(self, embeddings: np.ndarray, metadatas: List[Any] = None):
         if embeddings is None or len(embeddings) == 0 or (hasattr(embeddings, 'shape') and embeddings.shape[0] == 0):
             print("[INFO] No embeddings to add. Skipping.")
@@ -62,8 +116,34 @@ class FaissVectorStore:
         faiss.write_index(self.index, faiss_path)
         with open(meta_path, "wb") as f:
             pickle.dump(self.metadata, f)
+        self._write_manifest()
         print(f"[INFO] Saved Faiss index and metadata to {self.persist_dir}")
 
+    def _write_manifest(self):
+        manifest = {
+            "embedding_backend": self.embedding_backend,
+            "embedding_model": self.embedding_model,
+            "dimension": self.index.d if self.index is not None else None,
+        }
+        with open(os.path.join(self.persist_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    def _check_manifest(self):
+        manifest_path = os.path.join(self.persist_dir, "manifest.json")
+        if not os.path.exists(manifest_path):
+            # Indexes built before manifests existed were always Bedrock Titan
+            manifest = {"embedding_backend": "bedrock", "embedding_model": DEFAULT_EMBEDDING_MODELS["bedrock"]}
+        else:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        built_with = (manifest.get("embedding_backend"), manifest.get("embedding_model"))
+        if built_with != (self.embedding_backend, self.embedding_model):
+            raise ValueError(
+                f"Index in {self.persist_dir} was built with {built_with[0]} model {built_with[1]}, "
+                f"but this store is configured for {self.embedding_backend} model {self.embedding_model}. "
+                f"Rebuild the index or change the embedding settings."
+            )
+
     def load(self, documents: List[Any] = None):
         faiss_path = os.path.join(self.persist_dir, "faiss.index")
         meta_path = os.path.join(self.persist_dir, "metadata.pkl")
@@ -72,29 +152,58 @@ class FaissVectorStore:
             if documents is None:
                 raise FileNotFoundError("No index found and no documents provided to build one.")
             self.build_from_documents(documents)
-        self.index = faiss.read_index(faiss_path)
+        self._check_manifest()
+        index = faiss.read_index(faiss_path)
         with open(meta_path, "rb") as f:
-            self.metadata = pickle.load(f)
+            metadata = pickle.load(f)
+        if index.ntotal != len(metadata):
+            # Index and metadata read from two different builds (e.g. during a rebuild swap)
+            raise ValueError(f"Index in {self.persist_dir} has {index.ntotal} vectors but {len(metadata)} metadata entries.")
+        self.index = index
+        self.metadata = metadata
         print(f"[INFO] Loaded Faiss index and metadata from {self.persist_dir}")
 
-    def search(self, query_embedding: np.ndarray, top_k: int = 5):
-        D, I = self.index.search(query_embedding, top_k)
+    def search(self, query_embedding: np.ndarray, top_k: int = 5, metadata_filter: dict = None, fetch_k: int = None):
+        """
+        metadata_filter maps metadata keys to an expected value, a list/tuple/set of allowed values,
+        or a predicate. When set, fetch_k hits (default 10 * top_k) are fetched and filtered down to top_k.
+        """
+        k = top_k
+        if metadata_filter:
+            k = min(self.index.ntotal, fetch_k or top_k * 10)
+        D, I = self.index.search(query_embedding, k)
         results = []
         for idx, dist in zip(I[0], D[0]):
+            if idx < 0:
+                # FAISS pads with -1 when the index holds fewer than top_k vectors
+                continue
             meta = self.metadata[idx] if idx < len(self.metadata) else None
+            if metadata_filter and not _matches_filter(meta or {}, metadata_filter):
+                continue
             results.append({"index": idx, "distance": dist, "metadata": meta})
+            if len(results) == top_k:
+                break
         return results
 
-    def query(self, query_text: str, top_k: int = 5):
+    def query(self, query_text: str, top_k: int = 5, metadata_filter: dict = None, fetch_k: int = None):
         print(f"[INFO] Querying vector store for: '{query_text}'")
-        # Use Bedrock to embed the query text
-        response = self.bedrock.invoke_model(
-            modelId=self.embedding_model,
-            body=json.dumps({"inputText": query_text}).encode("utf-8")
-        )
-        response_body = json.loads(response["body"].read())
-        query_emb = np.array(response_body["embedding"]).reshape(1, -1).astype('float32')
-        return self.search(query_emb, top_k=top_k)
+        query_emb = self.backend.embed_query(query_text).reshape(1, -1).astype('float32')
+        return self.search(query_emb, top_k=top_k, metadata_filter=metadata_filter, fetch_k=fetch_k)
+
+
+def _matches_filter(meta: dict, metadata_filter: dict) -> bool:
+    for key, expected in metadata_filter.items():
+        value = meta.get(key)
+        if callable(expected):
+            if not expected(value):
+                return False
+        elif isinstance(expected, (list, tuple, set)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
 
 # Example usage
 # if __name__ == "__main__":
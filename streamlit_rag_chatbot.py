@@ -2,6 +2,7 @@ import streamlit as st
 import requests
 import os
 import shutil
+import uuid
 
 # -----------------------------------------------------------
 # Page config (must be first Streamlit call)
@@ -98,6 +99,9 @@ with left_col:
     # Initialize chat history
     if "messages" not in st.session_state:
         st.session_state.messages = []
+    # One id per browser session so the backend can tell follow-up questions apart between users
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
 
     # Display chat history (no scroll box, just grows downwards)
     for msg in st.session_state.messages:
@@ -149,7 +153,7 @@ if user_input:
     try:
         response = requests.post(
             "http://127.0.0.1:8000/chat",
-            json={"message": user_input},
+            json={"message": user_input, "session_id": st.session_state.session_id},
             timeout=120,
         )
         if response.status_code == 200:
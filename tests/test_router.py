@@ -0,0 +1,54 @@
+import pytest
+from src.router import QueryRouter, DIRECT, SIMPLE, FULL, FOLLOW_UP
+
+
+@pytest.fixture
+def router():
+    return QueryRouter()
+
+
+@pytest.mark.parametrize("query", [
+    "How do they calculate leave?",
+    "What is this policy about?",
+    "Who signed that contract?",
+    "Does it cover contractors?",
+    "What are these fees for?",
+])
+def test_new_questions_with_pronouns_are_not_follow_ups(router, query):
+    assert router.route(query, has_history=True) != FOLLOW_UP
+
+
+@pytest.mark.parametrize("query", [
+    "and the second one?",
+    "why?",
+    "Why not",
+    "tell me more",
+    "what about contractors?",
+    "the last one?",
+])
+def test_explicit_follow_ups_reuse_context(router, query):
+    assert router.route(query, has_history=True) == FOLLOW_UP
+
+
+def test_follow_up_needs_history(router):
+    assert router.route("and the second one?", has_history=False) != FOLLOW_UP
+
+
+@pytest.mark.parametrize("query,route", [
+    ("hi", DIRECT),
+    ("Thanks so much!", DIRECT),
+    ("What is the notice period?", SIMPLE),
+    ("Compare plan A and plan B", FULL),
+])
+def test_rule_routes(router, query, route):
+    assert router.route(query) == route
+
+
+def test_retrieval_routes_count_embedding_cost(router):
+    router.record(SIMPLE, 10.0, model_id="amazon.nova-micro-v1:0", prompt="x" * 400, answer="y" * 40,
+                  embedding_model="amazon.titan-embed-text-v2:0", query="q" * 40)
+    router.record(DIRECT, 5.0, model_id="amazon.nova-micro-v1:0", prompt="x" * 400, answer="y" * 40)
+    stats = router.stats()
+    assert stats[SIMPLE]["embedding_tokens"] == 10
+    assert stats[DIRECT]["embedding_tokens"] == 0
+    assert stats[SIMPLE]["cost_usd"] > stats[DIRECT]["cost_usd"]